@@ -0,0 +1,394 @@
+import os
+import sys
+import json
+import time
+import itertools
+import multiprocessing
+import cv2
+from pathlib import Path
+from ultralytics import YOLO
+
+
+# Файл с подобранной конфигурацией, который загружают скрипты обработки
+AUTOTUNE_CONFIG = Path("autotune.json")
+
+# Глобальное состояние процесса-воркера калибровки
+_worker_model = None
+_worker_frames = None
+
+
+def load_autotune_config(path=AUTOTUNE_CONFIG):
+    """
+    Загружает сохранённую конфигурацию CPU.
+
+    Конфигурация игнорируется, если она подобрана на машине
+    с другим числом ядер.
+
+    Возвращает:
+        Словарь с настройками или None, если файла нет или он не подходит
+    """
+    path = Path(path)
+    if not path.exists():
+        return None
+
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            config = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"⚠️  Не удалось прочитать {path}: {e}")
+        return None
+
+    if config.get("cpu_count") != os.cpu_count():
+        print(f"⚠️  {path} подобран для {config.get('cpu_count')} ядер, "
+              f"на этой машине {os.cpu_count()} - настройки не применяются")
+        return None
+
+    return config
+
+
+def set_cpu_threads(torch_threads, cv2_threads, pin_cores=False, worker_index=0):
+    """
+    Применяет настройки потоков к текущему процессу.
+
+    Параметры:
+        torch_threads: число потоков torch (intra-op)
+        cv2_threads: число потоков OpenCV (0 - без многопоточности)
+        pin_cores: привязать процесс к своему набору ядер
+        worker_index: номер процесса-воркера (для выбора ядер при привязке)
+    """
+    try:
+        import torch
+        torch.set_num_threads(torch_threads)
+    except ImportError:
+        pass
+
+    cv2.setNumThreads(cv2_threads)
+
+    # Привязка к ядрам доступна только на Linux
+    if pin_cores and hasattr(os, "sched_setaffinity"):
+        cpu_count = os.cpu_count() or 1
+        first = (worker_index * torch_threads) % cpu_count
+        cores = {(first + i) % cpu_count for i in range(torch_threads)}
+        try:
+            os.sched_setaffinity(0, cores)
+        except OSError as e:
+            print(f"⚠️  Не удалось привязать процесс к ядрам {sorted(cores)}: {e}")
+
+
+def config_for_workers(config, workers):
+    """
+    Подбирает настройки CPU для запуска с заданным числом процессов.
+
+    Если autotune.json подобран для другого числа процессов, для одного
+    процесса берётся лучшая однопроцессная конфигурация (best_single),
+    а для нескольких - ядра делятся поровну между процессами, чтобы
+    потоки torch не конкурировали за одни и те же ядра.
+
+    Параметры:
+        config: конфигурация из autotune.json (или None)
+        workers: число процессов
+
+    Возвращает:
+        Словарь настроек или None (оставить настройки по умолчанию)
+    """
+    if config is not None and config["workers"] == workers:
+        return config
+
+    if workers == 1:
+        return config.get("best_single") if config is not None else None
+
+    threads = max(1, (os.cpu_count() or 1) // workers)
+    return {
+        "workers": workers,
+        "torch_threads": threads,
+        "cv2_threads": threads,
+        "pin_cores": False,
+    }
+
+
+def apply_autotune_config(config=None, worker_index=0, workers=None):
+    """
+    Загружает (если не передана) и применяет конфигурацию CPU к текущему процессу.
+
+    Параметры:
+        config: словарь настроек; если None - читается из autotune.json
+        worker_index: номер процесса-воркера
+        workers: число процессов, с которым запущен скрипт; если задано,
+                 настройки подбираются через config_for_workers
+
+    Возвращает:
+        Применённую конфигурацию или None
+    """
+    if config is None:
+        config = load_autotune_config()
+    if workers is not None:
+        config = config_for_workers(config, workers)
+    if config is None:
+        return None
+
+    set_cpu_threads(
+        config["torch_threads"],
+        config["cv2_threads"],
+        pin_cores=config.get("pin_cores", False),
+        worker_index=worker_index
+    )
+    if worker_index == 0:
+        print(f"⚙️  Настройки CPU: воркеров {config['workers']}, "
+              f"torch {config['torch_threads']}, cv2 {config['cv2_threads']}, "
+              f"привязка {'да' if config.get('pin_cores') else 'нет'}")
+    return config
+
+
+def collect_sample_frames(dataset_dir, max_frames=16):
+    """
+    Собирает кадры для калибровки: изображения и равномерно взятые кадры видео.
+
+    Параметры:
+        dataset_dir: каталог с данными
+        max_frames: максимальное число кадров
+
+    Возвращает:
+        Список кадров (numpy массивы BGR)
+    """
+    from yolo_image import iter_image_files
+    from yolo_video import VIDEO_EXTENSIONS
+
+    frames = []
+
+    for image_path in iter_image_files(dataset_dir):
+        if len(frames) >= max_frames // 2:
+            break
+        frame = cv2.imread(str(image_path))
+        if frame is not None:
+            frames.append(frame)
+
+    video_files = sorted(
+        path for path in Path(dataset_dir).iterdir()
+        if path.is_file() and path.suffix.lower() in VIDEO_EXTENSIONS
+    )
+    for video_path in video_files:
+        if len(frames) >= max_frames:
+            break
+        cap = cv2.VideoCapture(str(video_path))
+        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        needed = max(1, min(max_frames - len(frames), 4))
+        for i in range(needed):
+            cap.set(cv2.CAP_PROP_POS_FRAMES, total_frames * i // needed)
+            ret, frame = cap.read()
+            if ret:
+                frames.append(frame)
+        cap.release()
+
+    return frames
+
+
+def _init_worker(frames, torch_threads, cv2_threads, pin_cores, counter):
+    """Инициализация процесса-воркера: настройки потоков, модель, прогрев."""
+    global _worker_model, _worker_frames
+
+    with counter.get_lock():
+        worker_index = counter.value
+        counter.value += 1
+
+    set_cpu_threads(torch_threads, cv2_threads, pin_cores, worker_index)
+    _worker_frames = frames
+    _worker_model = YOLO("yolo11n.pt")
+    _worker_model(frames[0], conf=0.75, verbose=False)
+
+
+def _infer_frame(index):
+    """Задача воркера: один прогон модели на кадре из калибровочного набора."""
+    _worker_model(_worker_frames[index % len(_worker_frames)], conf=0.75, verbose=False)
+    return index
+
+
+def benchmark_config(frames, workers, torch_threads, cv2_threads, pin_cores, repeats=2):
+    """
+    Измеряет пропускную способность одной комбинации настроек.
+
+    Возвращает:
+        Кадров в секунду
+    """
+    counter = multiprocessing.Value("i", 0)
+    tasks = list(range(len(frames) * repeats))
+
+    with multiprocessing.Pool(
+        workers,
+        initializer=_init_worker,
+        initargs=(frames, torch_threads, cv2_threads, pin_cores, counter)
+    ) as pool:
+        # Прогрев: дожидаемся загрузки модели во всех воркерах
+        pool.map(_infer_frame, range(workers * 2), chunksize=1)
+
+        start_time = time.perf_counter()
+        pool.map(_infer_frame, tasks, chunksize=1)
+        elapsed = time.perf_counter() - start_time
+
+    return len(tasks) / elapsed
+
+
+def candidate_configs(cpu_count, max_workers=None, try_pinning=True):
+    """Перебирает комбинации (воркеры, потоки torch, потоки cv2, привязка к ядрам)."""
+    powers = [n for n in (1, 2, 4, 8, 16, 32, 64) if n <= cpu_count]
+    if cpu_count not in powers:
+        powers.append(cpu_count)
+
+    pin_options = [False, True] if try_pinning and hasattr(os, "sched_setaffinity") else [False]
+
+    for workers in powers:
+        if max_workers and workers > max_workers:
+            continue
+        for torch_threads in powers:
+            if workers * torch_threads > cpu_count:
+                continue
+            for cv2_threads, pin_cores in itertools.product(sorted({0, torch_threads}), pin_options):
+                yield workers, torch_threads, cv2_threads, pin_cores
+
+
+def run_autotune(dataset_dir="dataset", output=AUTOTUNE_CONFIG, samples=16, repeats=2,
+                 max_workers=None, try_pinning=True):
+    """
+    Подбирает лучшее сочетание процессов и потоков для CPU и сохраняет его в файл.
+
+    Параметры:
+        dataset_dir: каталог с данными для калибровки
+        output: путь к файлу конфигурации
+        samples: число калибровочных кадров
+        repeats: сколько раз прогонять каждый кадр
+        max_workers: ограничение на число процессов
+        try_pinning: пробовать привязку процессов к ядрам
+
+    Возвращает:
+        Лучшую конфигурацию (словарь)
+    """
+
+    dataset_dir = Path(dataset_dir)
+    if not dataset_dir.exists():
+        print(f"❌ Ошибка: каталог dataset не найден: {dataset_dir}")
+        sys.exit(1)
+
+    frames = collect_sample_frames(dataset_dir, max_frames=samples)
+    if not frames:
+        print("⚠️  В каталоге dataset не найдено кадров для калибровки")
+        sys.exit(1)
+
+    cpu_count = os.cpu_count() or 1
+    configs = list(candidate_configs(cpu_count, max_workers, try_pinning))
+
+    print(f"🔍 Кадров для калибровки: {len(frames)}, ядер CPU: {cpu_count}")
+    print(f"🧪 Комбинаций для проверки: {len(configs)}")
+    print("-" * 50)
+
+    best = None
+    best_single = None
+    for workers, torch_threads, cv2_threads, pin_cores in configs:
+        label = (f"воркеров {workers}, torch {torch_threads}, cv2 {cv2_threads}, "
+                 f"привязка {'да' if pin_cores else 'нет'}")
+        try:
+            fps = benchmark_config(frames, workers, torch_threads, cv2_threads, pin_cores, repeats)
+        except Exception as e:
+            print(f"   ❌ {label}: ошибка {e}")
+            continue
+
+        print(f"   ⏱️  {label}: {fps:.2f} кадров/с")
+        candidate = {
+            "workers": workers,
+            "torch_threads": torch_threads,
+            "cv2_threads": cv2_threads,
+            "pin_cores": pin_cores,
+            "fps": round(fps, 2),
+        }
+        if best is None or fps > best["fps"]:
+            best = candidate
+        # Отдельно лучший вариант для однопроцессных скриптов (видео, поток)
+        if workers == 1 and (best_single is None or fps > best_single["fps"]):
+            best_single = candidate
+
+    if best is None:
+        print("❌ Ни одна комбинация не отработала")
+        sys.exit(1)
+
+    best = dict(best, cpu_count=cpu_count, best_single=best_single)
+
+    output = Path(output)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(best, f, ensure_ascii=False, indent=2)
+
+    print("-" * 50)
+    print(f"🏆 Лучшая конфигурация: воркеров {best['workers']}, torch {best['torch_threads']}, "
+          f"cv2 {best['cv2_threads']}, привязка {'да' if best['pin_cores'] else 'нет'} "
+          f"- {best['fps']} кадров/с")
+    if best_single is not None:
+        print(f"🥇 Для одного процесса: torch {best_single['torch_threads']}, "
+              f"cv2 {best_single['cv2_threads']}, привязка {'да' if best_single['pin_cores'] else 'нет'} "
+              f"- {best_single['fps']} кадров/с")
+    print(f"📁 Сохранено в: {output.absolute()}")
+    return best
+
+
+def main():
+    """Точка входа для подбора настроек CPU."""
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Подбор числа процессов и потоков для инференса на CPU"
+    )
+    parser.add_argument(
+        "-d", "--dataset",
+        type=str,
+        default="dataset",
+        help="Каталог с данными для калибровки (по умолчанию: dataset)"
+    )
+    parser.add_argument(
+        "-o", "--output",
+        type=str,
+        default=str(AUTOTUNE_CONFIG),
+        help=f"Файл конфигурации (по умолчанию: {AUTOTUNE_CONFIG})"
+    )
+    parser.add_argument(
+        "--samples",
+        type=int,
+        default=16,
+        help="Число калибровочных кадров (по умолчанию: 16)"
+    )
+    parser.add_argument(
+        "--repeats",
+        type=int,
+        default=2,
+        help="Сколько раз прогонять каждый кадр (по умолчанию: 2)"
+    )
+    parser.add_argument(
+        "--max-workers",
+        type=int,
+        default=None,
+        help="Максимальное число процессов (по умолчанию: число ядер)"
+    )
+    parser.add_argument(
+        "--no-pinning",
+        action="store_true",
+        help="Не пробовать привязку процессов к ядрам"
+    )
+
+    args = parser.parse_args()
+
+    try:
+        run_autotune(
+            dataset_dir=args.dataset,
+            output=args.output,
+            samples=args.samples,
+            repeats=args.repeats,
+            max_workers=args.max_workers,
+            try_pinning=not args.no_pinning
+        )
+    except KeyboardInterrupt:
+        print("\n⚠️  Прервано пользователем")
+        sys.exit(0)
+    except Exception as e:
+        print(f"❌ Критическая ошибка: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
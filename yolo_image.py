@@ -1,23 +1,110 @@
 import os
 import sys
+import json
+import zlib
 import shutil
+import itertools
+import multiprocessing
+import cv2
 from pathlib import Path
+from PIL import Image
 from ultralytics import YOLO
 
+from yolo_autotune import load_autotune_config, apply_autotune_config, config_for_workers
 
-def process_images():
-    """Сканирует каталог dataset, обрабатывает все JPG изображения и сохраняет результаты."""
+
+# Класс "cat" в COCO - номер 15
+CAT_CLASS = 15
+
+# Расширение обрабатываемых изображений
+IMAGE_EXTENSIONS = [".jpg"]
+
+# Каталог для результатов
+RESULT_DIR = Path("result") / "images"
+
+# Размер входа модели (длинная сторона после letterbox)
+INFERENCE_SIZE = 640
+
+# Режимы OpenCV для декодирования JPEG в уменьшенном масштабе (DCT scaling)
+REDUCED_DECODE_MODES = {
+    2: cv2.IMREAD_REDUCED_COLOR_2,
+    4: cv2.IMREAD_REDUCED_COLOR_4,
+    8: cv2.IMREAD_REDUCED_COLOR_8,
+}
+
+# Значения EXIF Orientation, при которых изображение поворачивается на 90°
+EXIF_TRANSPOSED_ORIENTATIONS = (5, 6, 7, 8)
+
+
+def iter_image_files(dataset_dir, recursive=True):
+    """
+    Лениво обходит каталог и выдаёт пути к JPG изображениям.
     
-    # Пути к каталогам
-    dataset_dir = Path("dataset")
-    result_dir = Path("result\\images")
+    Записи каталога читаются через os.scandir по одной, поэтому память
+    не растёт с числом файлов: хранятся только стек ещё не обойдённых
+    подкаталогов и список подкаталогов текущего каталога. Файлы выдаются
+    в порядке файловой системы (для шардирования порядок не важен),
+    подкаталоги обходятся по алфавиту.
     
-    # Создаём каталог result, если он не существует
-    result_dir.mkdir(parents=True, exist_ok=True)
-    print(f"📁 Каталог result готов: {result_dir.absolute()}")
+    Параметры:
+        dataset_dir: корневой каталог
+        recursive: обходить подкаталоги
+    
+    Возвращает:
+        Генератор путей (Path)
+    """
+    stack = [Path(dataset_dir)]
+    
+    while stack:
+        directory = stack.pop()
+        try:
+            it = os.scandir(directory)
+        except OSError as e:
+            print(f"⚠️  Не удалось прочитать каталог {directory}: {e}")
+            continue
+        
+        subdirs = []
+        with it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    subdirs.append(Path(entry.path))
+                elif entry.is_file() and Path(entry.name).suffix.lower() in IMAGE_EXTENSIONS:
+                    yield Path(entry.path)
+        
+        if recursive:
+            # Обратный порядок, чтобы подкаталоги обходились по алфавиту
+            stack.extend(sorted(subdirs, reverse=True))
+
+
+def in_shard(relative_path, shard_index, shard_count):
+    """
+    Определяет, относится ли файл к шарду shard_index из shard_count.
+    
+    Используется CRC32 от относительного пути, поэтому разбиение одинаково
+    на всех машинах и не требует координатора.
+    """
+    if shard_count <= 1:
+        return True
+    key = relative_path.as_posix().encode("utf-8")
+    return zlib.crc32(key) % shard_count == shard_index
+
+
+def parse_shard(value):
+    """Разбирает аргумент вида 'i/N' (0 <= i < N) для argparse."""
+    import argparse
     
-    # Очищаем каталог result перед началом
-    for f in result_dir.glob("*"):
+    try:
+        index, count = (int(part) for part in value.split("/"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"ожидается формат i/N, получено: {value}")
+    if count < 1 or not 0 <= index < count:
+        raise argparse.ArgumentTypeError(f"номер шарда должен быть в диапазоне 0..N-1: {value}")
+    return index, count
+
+
+def clear_results(result_dir):
+    """Очищает каталог результатов и временную папку runs перед новым запуском."""
+    for f in result_dir.rglob("*"):
         if f.is_file():
             f.unlink()
     print(f"🗑️  Каталог result очищен")
@@ -29,20 +116,216 @@ def process_images():
             print(f"🗑️  Старая папка runs удалена")
         except Exception as e:
             print(f"⚠️  Не удалось удалить runs: {e}")
+
+
+def read_image_size(image_path):
+    """
+    Читает размер изображения из заголовка, не декодируя пиксели.
+    
+    Возвращает:
+        (ширина, высота) с учётом поворота по EXIF
+    """
+    with Image.open(image_path) as image:
+        width, height = image.size
+        orientation = image.getexif().get(0x0112)
+    if orientation in EXIF_TRANSPOSED_ORIENTATIONS:
+        width, height = height, width
+    return width, height
+
+
+def choose_decode_scale(width, height, imgsz=INFERENCE_SIZE):
+    """Выбирает наибольший коэффициент уменьшения (1, 2, 4, 8), при котором длинная сторона >= imgsz."""
+    for scale in sorted(REDUCED_DECODE_MODES, reverse=True):
+        if max(width, height) / scale >= imgsz:
+            return scale
+    return 1
+
+
+def process_image_reduced(model, image_path, result_dir):
+    """
+    Обрабатывает JPEG, декодируя его сразу в уменьшенном масштабе (1/2, 1/4, 1/8).
+    
+    Размеченное изображение сохраняется в уменьшенном разрешении, а боксы
+    в координатах исходного изображения - в JSON рядом с ним.
+    
+    Возвращает:
+        True при успешной обработке, False при ошибке
+    """
+    width, height = read_image_size(image_path)
+    scale = choose_decode_scale(width, height)
+    
+    if scale > 1:
+        frame = cv2.imread(str(image_path), REDUCED_DECODE_MODES[scale])
+    else:
+        frame = cv2.imread(str(image_path), cv2.IMREAD_COLOR)
+    if frame is None:
+        print(f"   ❌ Ошибка: не удалось декодировать изображение")
+        return False
+    
+    print(f"   📐 Декодировано в 1/{scale}: {frame.shape[1]}x{frame.shape[0]} (исходное {width}x{height})")
+    
+    results = model(frame, conf=0.25, imgsz=INFERENCE_SIZE, classes=[CAT_CLASS], verbose=False)
+    
+    # Переводим боксы в координаты исходного изображения
+    scale_x = width / frame.shape[1]
+    scale_y = height / frame.shape[0]
+    detections = []
+    for r in results:
+        if r.boxes is None:
+            continue
+        for box in r.boxes:
+            x1, y1, x2, y2 = box.xyxy[0].cpu().numpy().tolist()
+            detections.append({
+                "box": [round(x1 * scale_x, 1), round(y1 * scale_y, 1),
+                        round(x2 * scale_x, 1), round(y2 * scale_y, 1)],
+                "conf": round(float(box.conf[0]), 4),
+            })
+    
+    result_dir.mkdir(parents=True, exist_ok=True)
+    if results:
+        cv2.imwrite(str(result_dir / image_path.name), results[0].plot())
+        print(f"   ✅ Сохранено: {image_path.name}")
+    
+    with open(result_dir / f"{image_path.stem}.json", "w", encoding="utf-8") as f:
+        json.dump({"width": width, "height": height, "scale": scale, "detections": detections},
+                  f, ensure_ascii=False, indent=2)
+    
+    print(f"   ✅ Успешно обработано: {image_path.name} (кошек: {len(detections)})")
+    return True
+
+
+def process_image_file(model, image_path, result_dir, run_name="temp", reduced_decode=False):
+    """
+    Обрабатывает одно изображение уже загруженной моделью и сохраняет результат.
+    
+    Параметры:
+        model: загруженная модель YOLO
+        image_path: путь к изображению
+        result_dir: каталог для сохранения результата
+        run_name: имя временного каталога в runs/detect
+        reduced_decode: декодировать JPEG в уменьшенном масштабе
+    
+    Возвращает:
+        True при успешной обработке, False при ошибке
+    """
+    filename = image_path.name
+    run_dir = Path("runs/detect") / run_name
+    
+    try:
+        print(f"▶️  Обрабатываю: {filename}")
+        
+        # Проверяем доступность файла
+        if not os.access(image_path, os.R_OK):
+            print(f"   ❌ Ошибка доступа: файл недоступен для чтения")
+            return False
+        
+        if reduced_decode:
+            return process_image_reduced(model, image_path, result_dir)
+        
+        # Очищаем временную папку перед каждым изображением
+        if run_dir.exists():
+            shutil.rmtree(run_dir, ignore_errors=True)
+        
+        # Обрабатываем изображение - фильтруем только кошек (класс 15)
+        results = model(
+            source=str(image_path),
+            conf=0.25,
+            save=True,
+            project="runs/detect",
+            name=run_name,
+            exist_ok=True,
+            classes=[CAT_CLASS]  # Только кошки
+        )
+        
+        # Получаем путь сохранения из результата
+        if results and len(results) > 0:
+            save_dir = results[0].save_dir
+            
+            if save_dir:
+                # Ищем все файлы в директории сохранения
+                save_path = Path(save_dir)
+                if save_path.exists():
+                    result_dir.mkdir(parents=True, exist_ok=True)
+                    for f in save_path.glob("*.jpg"):
+                        dest_path = result_dir / f.name
+                        shutil.copy2(f, dest_path)
+                        print(f"   ✅ Сохранено: {f.name}")
+                else:
+                    print(f"   ⚠️ Директория не существует: {save_path}")
+            
+            print(f"   ✅ Успешно обработано: {filename}")
+        else:
+            print(f"   ⚠️  Результат пустой для {filename}")
+        return True
+        
+    except PermissionError as e:
+        print(f"   ❌ Ошибка доступа к файлу {filename}: {e}")
+        return False
+        
+    except OSError as e:
+        print(f"   ❌ Ошибка OS при обработке {filename}: {e}")
+        return False
+        
+    except Exception as e:
+        print(f"   ❌ Неожиданная ошибка при обработке {filename}: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+def process_images(dataset_dir="dataset", shard_index=0, shard_count=1, recursive=True,
+                   reduced_decode=False):
+    """
+    Сканирует каталог dataset, обрабатывает все JPG изображения и сохраняет результаты.
+    
+    Параметры:
+        dataset_dir: каталог с изображениями
+        shard_index: номер шарда (с нуля)
+        shard_count: общее число шардов
+        recursive: обходить подкаталоги
+        reduced_decode: декодировать JPEG в уменьшенном масштабе
+    """
+    
+    # Пути к каталогам
+    dataset_dir = Path(dataset_dir)
+    result_dir = RESULT_DIR
+    sharded = shard_count > 1
+    
+    # Каждый шард пишет во временный каталог и манифест со своим именем
+    run_name = f"temp_{shard_index}_of_{shard_count}" if sharded else "temp"
+    run_dir = Path("runs/detect") / run_name
+    manifest_path = result_dir / f"manifest_{shard_index}_of_{shard_count}.tsv"
+    
+    # Создаём каталог result, если он не существует
+    result_dir.mkdir(parents=True, exist_ok=True)
+    print(f"📁 Каталог result готов: {result_dir.absolute()}")
+    
+    if sharded:
+        # Каталог result может быть общим для шардов - не трогаем чужие результаты
+        print(f"🧩 Шард {shard_index}/{shard_count}: каталог result не очищается")
+        if run_dir.exists():
+            shutil.rmtree(run_dir, ignore_errors=True)
+    else:
+        # Очищаем каталог result перед началом
+        clear_results(result_dir)
     
     # Проверяем существование каталога dataset
     if not dataset_dir.exists():
         print(f"❌ Ошибка: каталог dataset не найден: {dataset_dir}")
         sys.exit(1)
     
-    # Находим все файлы с расширением .jpg
-    jpg_files = list(dataset_dir.glob("*.jpg"))
+    # Лениво перебираем файлы своего шарда
+    image_files = (
+        image_path for image_path in iter_image_files(dataset_dir, recursive=recursive)
+        if in_shard(image_path.relative_to(dataset_dir), shard_index, shard_count)
+    )
     
-    if not jpg_files:
+    first_image = next(image_files, None)
+    if first_image is None:
         print("⚠️  В каталоге dataset не найдены файлы с расширением .jpg")
         return
     
-    print(f"🔍 Найдено {len(jpg_files)} изображений для обработки")
+    print(f"🔍 Обрабатываю изображения из {dataset_dir.absolute()}")
     print("-" * 50)
     
     # Загружаем YOLO модель
@@ -58,74 +341,26 @@ def process_images():
     success_count = 0
     error_count = 0
     
-    # Класс "cat" в COCO - номер 15
-    CAT_CLASS = 15
-    
-    # Обрабатываем каждое изображение
-    for image_path in sorted(jpg_files):
-        filename = image_path.name
-        
-        try:
-            print(f"▶️  Обрабатываю: {filename}")
+    # Обрабатываем каждое изображение, записывая результат в манифест шарда
+    with open(manifest_path, "w", encoding="utf-8") as manifest:
+        for image_path in itertools.chain([first_image], image_files):
+            relative_path = image_path.relative_to(dataset_dir)
             
-            # Проверяем доступность файла
-            if not os.access(image_path, os.R_OK):
-                print(f"   ❌ Ошибка доступа: файл недоступен для чтения")
-                error_count += 1
-                continue
-            
-            # Очищаем временную папку runs перед каждым изображением
-            if Path("runs").exists():
-                shutil.rmtree("runs", ignore_errors=True)
-            
-            # Обрабатываем изображение - фильтруем только кошек (класс 15)
-            results = model(
-                source=str(image_path),
-                conf=0.25,
-                save=True,
-                project="runs/detect",
-                name="temp",
-                exist_ok=True,
-                classes=[CAT_CLASS]  # Только кошки
-            )
-            
-            # Получаем путь сохранения из результата
-            if results and len(results) > 0:
-                save_dir = results[0].save_dir
-                
-                if save_dir:
-                    # Ищем все файлы в директории сохранения
-                    save_path = Path(save_dir)
-                    if save_path.exists():
-                        for f in save_path.glob("*.jpg"):
-                            dest_path = result_dir / f.name
-                            shutil.copy2(f, dest_path)
-                            print(f"   ✅ Сохранено: {f.name}")
-                    else:
-                        print(f"   ⚠️ Директория не существует: {save_path}")
-                
-                print(f"   ✅ Успешно обработано: {filename}")
+            # Сохраняем структуру подкаталогов, чтобы одинаковые имена не затирали друг друга
+            ok = process_image_file(model, image_path, result_dir / relative_path.parent, run_name,
+                                    reduced_decode)
+            if ok:
                 success_count += 1
             else:
-                print(f"   ⚠️  Результат пустой для {filename}")
-                success_count += 1
-            
-        except PermissionError as e:
-            print(f"   ❌ Ошибка доступа к файлу {filename}: {e}")
-            error_count += 1
-            
-        except OSError as e:
-            print(f"   ❌ Ошибка OS при обработке {filename}: {e}")
-            error_count += 1
+                error_count += 1
             
-        except Exception as e:
-            print(f"   ❌ Неожиданная ошибка при обработке {filename}: {e}")
-            import traceback
-            traceback.print_exc()
-            error_count += 1
+            manifest.write(f"{relative_path.as_posix()}\t{'ok' if ok else 'error'}\n")
+            manifest.flush()
     
     # Удаляем временную папку runs в конце
-    if Path("runs").exists():
+    if sharded:
+        shutil.rmtree(run_dir, ignore_errors=True)
+    elif Path("runs").exists():
         shutil.rmtree("runs", ignore_errors=True)
         print(f"🗑️  Папка runs удалена")
     
@@ -136,11 +371,131 @@ def process_images():
     if error_count > 0:
         print(f"   ❌ Ошибок: {error_count}")
     print(f"   📁 Результаты сохранены в: {result_dir.absolute()}")
+    print(f"   📝 Манифест: {manifest_path.absolute()}")
 
 
-if __name__ == "__main__":
+def run_image_worker(config, worker_index, dataset_dir, shard_index, shard_count, recursive,
+                     reduced_decode):
+    """Процесс-воркер: применяет настройки CPU и обрабатывает свой шард."""
+    apply_autotune_config(config, worker_index=worker_index)
+    process_images(dataset_dir, shard_index, shard_count, recursive, reduced_decode)
+
+
+def process_images_parallel(config, dataset_dir="dataset", workers=2, recursive=True,
+                            reduced_decode=False, shard_index=0, shard_count=1):
+    """
+    Обрабатывает изображения в нескольких процессах, каждый - свой шард.
+    
+    Шард узла i/N делится на подшарды i + N*k из N*W (k = 0..W-1). Файл
+    с hash % (N*W) == i + N*k всегда имеет hash % N == i, поэтому узел
+    обрабатывает ровно свой шард i/N при любом числе локальных процессов W.
+    
+    Параметры:
+        config: конфигурация CPU из autotune.json (или None)
+        dataset_dir: каталог с изображениями
+        workers: число процессов
+        recursive: обходить подкаталоги
+        reduced_decode: декодировать JPEG в уменьшенном масштабе
+        shard_index: номер шарда узла (с нуля)
+        shard_count: общее число шардов (узлов)
+    """
+    RESULT_DIR.mkdir(parents=True, exist_ok=True)
+    if shard_count > 1:
+        # Каталог result может быть общим для узлов - не трогаем чужие результаты
+        print(f"🧩 Шард {shard_index}/{shard_count} делится на {workers} локальных процессов")
+    else:
+        clear_results(RESULT_DIR)
+        print(f"🧩 Запускаю {workers} процессов обработки")
+    
+    sub_shard_count = shard_count * workers
+    processes = [
+        multiprocessing.Process(
+            target=run_image_worker,
+            args=(config, worker_index, dataset_dir, shard_index + shard_count * worker_index,
+                  sub_shard_count, recursive, reduced_decode)
+        )
+        for worker_index in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+    
+    # Удаляем временную папку runs в конце (при шардировании - только свои подкаталоги)
+    if shard_count == 1 and Path("runs").exists():
+        shutil.rmtree("runs", ignore_errors=True)
+        print(f"🗑️  Папка runs удалена")
+    
+    failed = sum(1 for process in processes if process.exitcode != 0)
+    if failed > 0:
+        print(f"❌ Процессов завершилось с ошибкой: {failed}")
+
+
+def main():
+    """Точка входа для обработки изображений."""
+    import argparse
+    
+    parser = argparse.ArgumentParser(
+        description="Обнаружение кошек на изображениях из каталога"
+    )
+    parser.add_argument(
+        "-d", "--dataset",
+        type=str,
+        default="dataset",
+        help="Каталог с изображениями (по умолчанию: dataset)"
+    )
+    parser.add_argument(
+        "--shard",
+        type=parse_shard,
+        default=(0, 1),
+        help="Обработать только шард i из N, формат i/N (по умолчанию: 0/1)"
+    )
+    parser.add_argument(
+        "--no-recursive",
+        action="store_true",
+        help="Не обходить подкаталоги"
+    )
+    parser.add_argument(
+        "--reduced",
+        action="store_true",
+        help="Декодировать JPEG сразу в 1/2, 1/4 или 1/8 масштаба (быстрее, меньше памяти)"
+    )
+    parser.add_argument(
+        "-w", "--workers",
+        type=int,
+        default=None,
+        help="Число процессов обработки (по умолчанию: из autotune.json или 1)"
+    )
+    
+    args = parser.parse_args()
+    
+    # Настройки CPU, подобранные yolo_autotune.py. В одном процессе применяется
+    # best_single, при нескольких - конфигурация для этого числа процессов
+    config = load_autotune_config()
+    workers = args.workers or (config["workers"] if config else 1)
+    config = config_for_workers(config, workers)
+    
     try:
-        process_images()
+        if workers > 1:
+            # С --shard шард узла дополнительно делится между локальными процессами
+            process_images_parallel(
+                config,
+                dataset_dir=args.dataset,
+                workers=workers,
+                recursive=not args.no_recursive,
+                reduced_decode=args.reduced,
+                shard_index=args.shard[0],
+                shard_count=args.shard[1]
+            )
+        else:
+            apply_autotune_config(config)
+            process_images(
+                dataset_dir=args.dataset,
+                shard_index=args.shard[0],
+                shard_count=args.shard[1],
+                recursive=not args.no_recursive,
+                reduced_decode=args.reduced
+            )
     except KeyboardInterrupt:
         print("\n⚠️  Прервано пользователем")
         sys.exit(0)
@@ -149,3 +504,7 @@ if __name__ == "__main__":
         import traceback
         traceback.print_exc()
         sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,293 @@
+import sys
+import json
+import time
+import queue
+import threading
+import cv2
+import numpy as np
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from ultralytics import YOLO
+
+from yolo_video import (
+    filter_cat_detections,
+    FILTER_MIN_CONF,
+    FILTER_MIN_SIZE,
+    FILTER_MIN_ASPECT,
+    FILTER_MAX_ASPECT,
+)
+
+
+# Максимальный размер тела запроса (байт)
+MAX_REQUEST_BYTES = 32 * 1024 * 1024
+
+# Сколько ждать результата детекции, прежде чем вернуть ошибку (секунд)
+REQUEST_TIMEOUT = 30.0
+
+
+def boxes_to_json(boxes):
+    """Преобразует отфильтрованные боксы в список словарей для JSON-ответа."""
+    detections = []
+    for box in boxes:
+        x1, y1, x2, y2 = box.xyxy[0].cpu().numpy().tolist()
+        detections.append({
+            "box": [round(x1, 1), round(y1, 1), round(x2, 1), round(y2, 1)],
+            "conf": round(float(box.conf[0]), 4),
+        })
+    return detections
+
+
+def run_batcher(model, request_queue, stop_event, max_batch=8, batch_window=0.005):
+    """
+    Собирает запросы из очереди в батчи и прогоняет их через модель одним вызовом.
+
+    Первый запрос ждётся без ограничения, после него батч добирается
+    в течение batch_window секунд или до max_batch кадров.
+
+    Параметры:
+        model: загруженная модель YOLO
+        request_queue: очередь пар (кадр, Future)
+        stop_event: событие остановки
+        max_batch: максимальный размер батча
+        batch_window: окно сбора батча в секундах
+    """
+    while not stop_event.is_set():
+        try:
+            first = request_queue.get(timeout=0.5)
+        except queue.Empty:
+            continue
+
+        batch = [first]
+        deadline = time.perf_counter() + batch_window
+        while len(batch) < max_batch:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(request_queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+
+        # Пропускаем запросы, клиенты которых уже получили ответ по таймауту
+        batch = [(frame, future) for frame, future in batch if future.set_running_or_notify_cancel()]
+        if not batch:
+            continue
+
+        frames = [frame for frame, _ in batch]
+        futures = [future for _, future in batch]
+
+        try:
+            results = model(frames, conf=0.75, verbose=False)
+        except Exception as e:
+            for future in futures:
+                future.set_exception(e)
+            continue
+
+        for r, future in zip(results, futures):
+            try:
+                boxes = r.boxes
+                filtered_boxes = []
+                if boxes is not None and len(boxes) > 0:
+                    filtered_boxes = filter_cat_detections(
+                        boxes,
+                        min_conf=FILTER_MIN_CONF,
+                        min_size=FILTER_MIN_SIZE,
+                        min_aspect=FILTER_MIN_ASPECT,
+                        max_aspect=FILTER_MAX_ASPECT
+                    )
+                future.set_result({
+                    "cat": len(filtered_boxes) > 0,
+                    "detections": boxes_to_json(filtered_boxes),
+                    "batch_size": len(batch),
+                })
+            except Exception as e:
+                future.set_exception(e)
+
+
+def make_handler(request_queue):
+    """Создаёт класс обработчика HTTP-запросов, привязанный к очереди батчера."""
+
+    class DetectionHandler(BaseHTTPRequestHandler):
+        """Обработчик запросов: POST /detect (тело - JPEG), GET /health."""
+
+        def send_json(self, status, payload):
+            body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path == "/health":
+                self.send_json(200, {"status": "ok", "queue": request_queue.qsize()})
+            else:
+                self.send_json(404, {"error": "not found"})
+
+        def do_POST(self):
+            if self.path != "/detect":
+                self.send_json(404, {"error": "not found"})
+                return
+
+            try:
+                length = int(self.headers.get("Content-Length") or 0)
+            except ValueError:
+                self.send_json(400, {"error": "некорректный Content-Length"})
+                return
+            if length <= 0:
+                self.send_json(400, {"error": "пустое тело запроса"})
+                return
+            if length > MAX_REQUEST_BYTES:
+                self.send_json(413, {"error": "слишком большое изображение"})
+                return
+
+            data = self.rfile.read(length)
+            frame = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+            if frame is None:
+                self.send_json(400, {"error": "не удалось декодировать изображение"})
+                return
+
+            # Ограничение глубины очереди: при перегрузке сразу отвечаем 503
+            future = Future()
+            try:
+                request_queue.put_nowait((frame, future))
+            except queue.Full:
+                self.send_json(503, {"error": "очередь переполнена"})
+                return
+
+            try:
+                result = future.result(timeout=REQUEST_TIMEOUT)
+            except FutureTimeoutError:
+                # Отменяем запрос, чтобы батчер не тратил на него место в батче
+                future.cancel()
+                self.send_json(504, {"error": "превышено время ожидания детекции"})
+                return
+            except Exception as e:
+                self.send_json(500, {"error": str(e)})
+                return
+
+            self.send_json(200, result)
+
+        def log_message(self, format, *args):
+            # Не засоряем вывод строкой на каждый запрос
+            pass
+
+    return DetectionHandler
+
+
+def run_detection_server(host="127.0.0.1", port=8000, max_batch=8, batch_window_ms=5.0, max_queue=64):
+    """
+    Запускает локальный HTTP-сервис обнаружения кошек с динамическим батчингом.
+
+    Параметры:
+        host: адрес для прослушивания
+        port: порт
+        max_batch: максимальный размер батча
+        batch_window_ms: окно сбора батча в миллисекундах
+        max_queue: максимальная глубина очереди запросов
+
+    Возвращает:
+        None
+    """
+
+    # Загружаем YOLO модель
+    print("🐱 Загружаю YOLOv11n...")
+    try:
+        model = YOLO("yolo11n.pt")
+        # Прогревочный проход, чтобы первый запрос не платил за инициализацию
+        model(np.zeros((640, 640, 3), dtype=np.uint8), verbose=False)
+        print("✅ Модель загружена и прогрета\n")
+    except Exception as e:
+        print(f"❌ Ошибка загрузки модели: {e}")
+        sys.exit(1)
+
+    request_queue = queue.Queue(maxsize=max_queue)
+    stop_event = threading.Event()
+
+    batcher = threading.Thread(
+        target=run_batcher,
+        args=(model, request_queue, stop_event, max_batch, batch_window_ms / 1000.0),
+        daemon=True
+    )
+    batcher.start()
+
+    server = ThreadingHTTPServer((host, port), make_handler(request_queue))
+    server.daemon_threads = True
+
+    print(f"🌐 Сервис запущен: http://{host}:{port}")
+    print(f"   POST /detect  - тело запроса: JPEG")
+    print(f"   GET  /health  - состояние сервиса")
+    print(f"📦 Батч: до {max_batch} кадров, окно {batch_window_ms} мс, очередь {max_queue}")
+    print("-" * 50)
+    print("🎯 Нажмите Ctrl+C для выхода")
+    print("-" * 50)
+
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        stop_event.set()
+        batcher.join(timeout=2.0)
+        print("✅ Сервис остановлен")
+
+
+def main():
+    """Точка входа для запуска HTTP-сервиса обнаружения."""
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Локальный HTTP-сервис обнаружения кошек"
+    )
+    parser.add_argument(
+        "--host",
+        type=str,
+        default="127.0.0.1",
+        help="Адрес для прослушивания (по умолчанию: 127.0.0.1)"
+    )
+    parser.add_argument(
+        "-p", "--port",
+        type=int,
+        default=8000,
+        help="Порт (по умолчанию: 8000)"
+    )
+    parser.add_argument(
+        "--max-batch",
+        type=int,
+        default=8,
+        help="Максимальный размер батча (по умолчанию: 8)"
+    )
+    parser.add_argument(
+        "--batch-window",
+        type=float,
+        default=5.0,
+        help="Окно сбора батча в миллисекундах (по умолчанию: 5)"
+    )
+    parser.add_argument(
+        "--max-queue",
+        type=int,
+        default=64,
+        help="Максимальная глубина очереди запросов (по умолчанию: 64)"
+    )
+
+    args = parser.parse_args()
+
+    try:
+        run_detection_server(
+            host=args.host,
+            port=args.port,
+            max_batch=args.max_batch,
+            batch_window_ms=args.batch_window,
+            max_queue=args.max_queue
+        )
+    except KeyboardInterrupt:
+        print("\n⚠️  Прервано пользователем")
+        sys.exit(0)
+    except Exception as e:
+        print(f"❌ Критическая ошибка: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,6 +4,32 @@ import time
 from pathlib import Path
 from ultralytics import YOLO
 
+from yolo_autotune import apply_autotune_config
+
+
+# Параметры фильтрации для устранения ложных срабатываний
+FILTER_MIN_CONF = 0.85    # Минимальная уверенность
+FILTER_MIN_SIZE = 50       # Минимальный размер (пикселей)
+FILTER_MIN_ASPECT = 0.5    # Минимальное соотношение сторон (w/h)
+FILTER_MAX_ASPECT = 2.0    # Максимальное соотношение сторон (w/h)
+
+# Уровни качества для адаптивного режима: от лучшего к самому быстрому.
+# Каждый шаг уменьшает размер входа, поэтому задержка кадра с детекцией
+# действительно падает (пропуск кадров её бы не менял)
+#   imgsz - размер входа модели
+#   roi   - детекция только в области вокруг последней найденной кошки,
+#           чтобы на малом входе кошка не теряла в разрешении
+QUALITY_LEVELS = [
+    {"imgsz": 640, "roi": False},
+    {"imgsz": 512, "roi": False},
+    {"imgsz": 416, "roi": False},
+    {"imgsz": 320, "roi": False},
+    {"imgsz": 256, "roi": True},
+]
+
+# Запас вокруг последнего бокса в режиме ROI (доля от размера бокса)
+ROI_MARGIN = 0.5
+
 
 def filter_cat_detections(boxes, min_conf=0.85, min_size=50, min_aspect=0.5, max_aspect=2.0):
     """
@@ -51,6 +77,118 @@ def filter_cat_detections(boxes, min_conf=0.85, min_size=50, min_aspect=0.5, max
     return filtered
 
 
+class LatencyController:
+    """
+    Подстраивает уровень качества под бюджет задержки кадра.
+    
+    Задержка кадра (захват, детекция, вывод) сглаживается экспоненциальным
+    средним. Если она выше бюджета, уровень понижается, если ниже
+    budget * headroom - повышается. Уровни отличаются размером входа модели,
+    а не пропуском кадров: пропуск не уменьшает задержку кадра с детекцией.
+    После каждого переключения уровень удерживается hold_seconds (повышение -
+    вдвое дольше), чтобы настройки не переключались туда-обратно.
+    """
+    
+    def __init__(self, budget_ms=100.0, levels=QUALITY_LEVELS, headroom=0.7,
+                 hold_seconds=2.0, alpha=0.1):
+        self.budget_ms = budget_ms
+        self.levels = levels
+        self.headroom = headroom
+        self.hold_seconds = hold_seconds
+        self.alpha = alpha
+        self.index = 0
+        self.latency_ms = None
+        self.last_switch_time = time.time()
+    
+    @property
+    def level(self):
+        """Текущий уровень качества."""
+        return self.levels[self.index]
+    
+    def update(self, latency_ms):
+        """
+        Учитывает задержку очередного кадра и при необходимости меняет уровень.
+        
+        Возвращает:
+            True, если уровень изменился
+        """
+        if self.latency_ms is None:
+            self.latency_ms = latency_ms
+        else:
+            self.latency_ms += self.alpha * (latency_ms - self.latency_ms)
+        
+        held = time.time() - self.last_switch_time
+        
+        if self.latency_ms > self.budget_ms and held >= self.hold_seconds:
+            if self.index < len(self.levels) - 1:
+                self.index += 1
+                self.last_switch_time = time.time()
+                return True
+        elif self.latency_ms < self.budget_ms * self.headroom and held >= self.hold_seconds * 2:
+            if self.index > 0:
+                self.index -= 1
+                self.last_switch_time = time.time()
+                return True
+        
+        return False
+    
+    def describe(self):
+        """Короткое описание текущего уровня для оверлея."""
+        level = self.level
+        roi = " ROI" if level["roi"] else ""
+        return f"Q{self.index}: {level['imgsz']}px{roi}"
+
+
+def detect_cats(model, frame, imgsz=640, roi_box=None):
+    """
+    Находит кошек на кадре (или в области вокруг roi_box) и фильтрует ложные срабатывания.
+    
+    Параметры:
+        model: загруженная модель YOLO
+        frame: кадр BGR
+        imgsz: размер входа модели
+        roi_box: последний бокс кошки (x1, y1, x2, y2) или None - весь кадр
+    
+    Возвращает:
+        Список пар (xyxy, conf) в координатах полного кадра
+    """
+    offset_x, offset_y = 0, 0
+    image = frame
+    
+    if roi_box is not None:
+        # Вырезаем область вокруг последнего бокса с запасом
+        height, width = frame.shape[:2]
+        x1, y1, x2, y2 = roi_box
+        margin_x = (x2 - x1) * ROI_MARGIN
+        margin_y = (y2 - y1) * ROI_MARGIN
+        offset_x = max(0, int(x1 - margin_x))
+        offset_y = max(0, int(y1 - margin_y))
+        image = frame[offset_y:min(height, int(y2 + margin_y)),
+                      offset_x:min(width, int(x2 + margin_x))]
+    
+    results = model(image, conf=0.75, imgsz=imgsz, verbose=False)
+    
+    detections = []
+    for r in results:
+        boxes = r.boxes
+        if boxes is not None and len(boxes) > 0:
+            # Фильтруем обнаружения
+            filtered_boxes = filter_cat_detections(
+                boxes,
+                min_conf=FILTER_MIN_CONF,
+                min_size=FILTER_MIN_SIZE,
+                min_aspect=FILTER_MIN_ASPECT,
+                max_aspect=FILTER_MAX_ASPECT
+            )
+            for box in filtered_boxes:
+                xyxy = box.xyxy[0].cpu().numpy()
+                xyxy[[0, 2]] += offset_x
+                xyxy[[1, 3]] += offset_y
+                detections.append((xyxy, float(box.conf[0])))
+    
+    return detections
+
+
 def check_cv2_gui_support():
     """Проверяет, поддерживает ли OpenCV GUI функции."""
     print("🔍 Проверяю поддержку GUI в OpenCV...")
@@ -68,7 +206,8 @@ def check_cv2_gui_support():
         return False
 
 
-def run_webcam_stream(camera_index=0, show_fps=True, output_file=None, window_name="YOLO Cat Detection"):
+def run_webcam_stream(camera_index=0, show_fps=True, output_file=None, window_name="YOLO Cat Detection",
+                      latency_budget_ms=None):
     """
     Запускает обнаружение кошек с вебкамеры в реальном времени.
     
@@ -77,6 +216,8 @@ def run_webcam_stream(camera_index=0, show_fps=True, output_file=None, window_na
         show_fps: показывать FPS
         output_file: путь для сохранения видео (если None - показывать на экране)
         window_name: название окна
+        latency_budget_ms: бюджет задержки кадра в мс для адаптивного режима
+                           (None - фиксированное качество)
     
     Возвращает:
         None
@@ -159,11 +300,13 @@ def run_webcam_stream(camera_index=0, show_fps=True, output_file=None, window_na
         print("💡 Используйте --output для сохранения видео в файл")
         print("-" * 50)
     
-    # Параметры фильтрации для устранения ложных срабатываний
-    FILTER_MIN_CONF = 0.85    # Минимальная уверенность
-    FILTER_MIN_SIZE = 50       # Минимальный размер (пикселей)
-    FILTER_MIN_ASPECT = 0.5    # Минимальное соотношение сторон (w/h)
-    FILTER_MAX_ASPECT = 2.0    # Максимальное соотношение сторон (w/h)
+    # Адаптивный контроль задержки
+    controller = None
+    if latency_budget_ms:
+        controller = LatencyController(budget_ms=latency_budget_ms)
+        # Минимальный буфер камеры, чтобы не копить устаревшие кадры (если backend поддерживает)
+        cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        print(f"🎚️  Адаптивный режим: бюджет задержки {latency_budget_ms:.0f} мс")
     
     # Переменные для FPS
     fps_counter = 0
@@ -187,6 +330,9 @@ def run_webcam_stream(camera_index=0, show_fps=True, output_file=None, window_na
     # Основной цикл
     running = True
     while running and cap.isOpened():
+        # Задержка кадра считается с момента запроса кадра у камеры
+        frame_start = time.perf_counter()
+        
         # Читаем кадр
         ret, frame = cap.read()
         if not ret:
@@ -195,48 +341,36 @@ def run_webcam_stream(camera_index=0, show_fps=True, output_file=None, window_na
         
         frame_count += 1
         
-        # Обрабатываем кадр через YOLO
-        results = model(frame, conf=0.75, verbose=False)
+        # Текущий уровень качества (в обычном режиме - полный кадр 640px на каждом кадре)
+        level = controller.level if controller else QUALITY_LEVELS[0]
         
-        # Применяем фильтры для устранения ложных срабатываний
-        has_valid_detection = False
+        # Обрабатываем кадр через YOLO (с фильтрацией ложных срабатываний)
+        # ROI только если кошка была найдена на предыдущем кадре
+        roi_box = None
+        if level["roi"] and last_valid_box is not None and frames_since_last_detection == 0:
+            roi_box = last_valid_box
+        detections = detect_cats(model, frame, imgsz=level["imgsz"], roi_box=roi_box)
         
-        for r in results:
-            boxes = r.boxes
-            if boxes is not None and len(boxes) > 0:
-                # Фильтруем обнаружения
-                filtered_boxes = filter_cat_detections(
-                    boxes,
-                    min_conf=FILTER_MIN_CONF,
-                    min_size=FILTER_MIN_SIZE,
-                    min_aspect=FILTER_MIN_ASPECT,
-                    max_aspect=FILTER_MAX_ASPECT
-                )
+        has_valid_detection = len(detections) > 0
+        
+        if has_valid_detection:
+            cats_total += 1
+            frames_since_last_detection = 0
+            
+            # Берём первое обнаружение (самое уверенное)
+            last_valid_box, last_valid_conf = detections[0]
+            
+            # Рисуем боксы на кадре
+            for xyxy, conf in detections:
+                x1, y1, x2, y2 = map(int, xyxy)
                 
-                if len(filtered_boxes) > 0:
-                    cats_total += 1
-                    has_valid_detection = True
-                    frames_since_last_detection = 0
-                    
-                    # Берём первое обнаружение (самое уверенное)
-                    box = filtered_boxes[0]
-                    last_valid_box = box.xyxy[0].cpu().numpy()
-                    last_valid_conf = float(box.conf[0])
-                    
-                    # Рисуем боксы на кадре
-                    for box in filtered_boxes:
-                        xyxy = box.xyxy[0].cpu().numpy()
-                        conf = float(box.conf[0])
-                        
-                        x1, y1, x2, y2 = map(int, xyxy)
-                        
-                        # Рисуем оранжевую рамку
-                        cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 165, 255), 4)
-                        
-                        # Добавляем подпись
-                        label = f"Cat: {conf:.2f}"
-                        cv2.putText(frame, label, (x1, y1 - 10), 
-                                   cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 165, 255), 2)
+                # Рисуем оранжевую рамку
+                cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 165, 255), 4)
+                
+                # Добавляем подпись
+                label = f"Cat: {conf:.2f}"
+                cv2.putText(frame, label, (x1, y1 - 10), 
+                           cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 165, 255), 2)
         
         # Трекинг: если нет валидной детекции, используем последнюю известную позицию
         if not has_valid_detection and last_valid_box is not None:
@@ -276,6 +410,12 @@ def run_webcam_stream(camera_index=0, show_fps=True, output_file=None, window_na
             cv2.putText(frame, f"FPS: {current_fps:.1f}", (10, height - 20), 
                        cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 1)
         
+        # Показываем уровень качества и сглаженную задержку
+        if controller is not None:
+            latency_text = f"{controller.latency_ms:.0f} ms" if controller.latency_ms is not None else "-"
+            cv2.putText(frame, f"{controller.describe()} | {latency_text}", (10, height - 45), 
+                       cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 1)
+        
         # Вывод: в файл или на экран
         if writer is not None:
             writer.write(frame)
@@ -293,6 +433,12 @@ def run_webcam_stream(camera_index=0, show_fps=True, output_file=None, window_na
                 writer = cv2.VideoWriter(str(output_path), fourcc, fps, (width, height))
                 gui_supported = False
         
+        # Адаптивный режим: задержка от захвата кадра до вывода
+        if controller is not None:
+            latency_ms = (time.perf_counter() - frame_start) * 1000
+            if controller.update(latency_ms):
+                print(f"🎚️  Качество: {controller.describe()} (задержка {controller.latency_ms:.0f} мс)")
+        
         # Проверяем нажатие клавиш (только если GUI доступен)
         if gui_supported:
             key = cv2.waitKey(1) & 0xFF
@@ -351,15 +497,29 @@ def main():
         default="YOLO Cat Detection", 
         help="Название окна"
     )
+    parser.add_argument(
+        "--adaptive", 
+        action="store_true", 
+        help="Подстраивать качество под бюджет задержки кадра"
+    )
+    parser.add_argument(
+        "--budget", 
+        type=float, 
+        default=100.0, 
+        help="Бюджет задержки кадра в мс для --adaptive (по умолчанию: 100)"
+    )
     
     args = parser.parse_args()
     
     try:
+        # Поток работает в одном процессе
+        apply_autotune_config(workers=1)
         run_webcam_stream(
             camera_index=args.camera,
             show_fps=not args.no_fps,
             output_file=args.output,
-            window_name=args.window_name
+            window_name=args.window_name,
+            latency_budget_ms=args.budget if args.adaptive else None
         )
     except KeyboardInterrupt:
         print("\n⚠️ Прервано пользователем")
@@ -1,5 +1,6 @@
 import os
 import sys
+import json
 import shutil
 import time
 import cv2
@@ -7,6 +8,24 @@ import numpy as np
 from pathlib import Path
 from ultralytics import YOLO
 
+from yolo_autotune import apply_autotune_config
+
+
+# Класс "cat" в COCO - номер 15
+CAT_CLASS = 15
+
+# Параметры фильтрации для устранения ложных срабатываний
+FILTER_MIN_CONF = 0.85    # Минимальная уверенность
+FILTER_MIN_SIZE = 50       # Минимальный размер (пикселей)
+FILTER_MIN_ASPECT = 0.5    # Минимальное соотношение сторон (w/h)
+FILTER_MAX_ASPECT = 2.0    # Максимальное соотношение сторон (w/h)
+
+# Поддерживаемые расширения видео файлов
+VIDEO_EXTENSIONS = [".mov", ".mp4", ".avi", ".mkv"]
+
+# Каталог для результатов
+RESULT_DIR = Path("result") / "video"
+
 
 def filter_cat_detections(boxes, min_conf=0.85, min_size=50, min_aspect=0.5, max_aspect=2.0):
     """
@@ -54,12 +73,425 @@ def filter_cat_detections(boxes, min_conf=0.85, min_size=50, min_aspect=0.5, max
     return filtered
 
 
+def find_video_files(dataset_dir):
+    """Находит уникальные видео файлы в каталоге (без учёта регистра имени)."""
+    video_files = []
+    seen_names = set()
+    
+    for ext in VIDEO_EXTENSIONS:
+        for video_file in dataset_dir.glob(f"*{ext}"):
+            # Используем lower для уникальности
+            name_lower = video_file.name.lower()
+            if name_lower not in seen_names:
+                seen_names.add(name_lower)
+                video_files.append(video_file)
+    
+    return video_files
+
+
+def process_video_file(model, video_path, result_dir):
+    """
+    Обрабатывает одно видео уже загруженной моделью и сохраняет размеченный mp4.
+    
+    Параметры:
+        model: загруженная модель YOLO
+        video_path: путь к видео файлу
+        result_dir: каталог для сохранения результата
+    
+    Возвращает:
+        True при успешной обработке, False при ошибке
+    """
+    filename = video_path.name
+    
+    try:
+        print(f"▶️  Обрабатываю: {filename}")
+        
+        # Проверяем доступность файла
+        if not os.access(video_path, os.R_OK):
+            print(f"   ❌ Ошибка доступа: файл недоступен для чтения")
+            return False
+        
+        # Открываем видео для покадровой обработки
+        cap = cv2.VideoCapture(str(video_path))
+        if not cap.isOpened():
+            print(f"   ❌ Ошибка: не удалось открыть видео")
+            return False
+        
+        # Получаем параметры видео
+        fps = int(cap.get(cv2.CAP_PROP_FPS))
+        width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        
+        # Создаём VideoWriter для сохранения результата
+        output_path = result_dir / f"{video_path.stem}.mp4"
+        fourcc = cv2.VideoWriter_fourcc(*'mp4v')
+        out = cv2.VideoWriter(str(output_path), fourcc, fps, (width, height))
+        
+        frame_idx = 0
+        cats_found = 0
+        frames_processed = 0
+        
+        # Трекинг: запоминаем последнюю обнаруженную позицию кошки
+        last_valid_box = None
+        last_valid_conf = 0.0
+        frames_since_last_detection = 0
+        MAX_FRAMES_WITHOUT_DETECTION = 60  # Увеличили до 60 кадров (~2 секунды при 30fps)
+        
+        print(f"   📹 Видео: {width}x{height}, {fps} fps, {total_frames} кадров")
+        
+        # Обрабатываем каждый кадр
+        while cap.isOpened():
+            ret, frame = cap.read()
+            if not ret:
+                break
+            
+            frame_idx += 1
+            
+            # Обрабатываем каждый кадр
+            results = model(frame, conf=0.75, verbose=False)
+            
+            # Применяем фильтры для устранения ложных срабатываний
+            has_valid_detection = False
+            
+            for r in results:
+                boxes = r.boxes
+                if boxes is not None and len(boxes) > 0:
+                    # Фильтруем обнаружения
+                    filtered_boxes = filter_cat_detections(
+                        boxes,
+                        min_conf=FILTER_MIN_CONF,
+                        min_size=FILTER_MIN_SIZE,
+                        min_aspect=FILTER_MIN_ASPECT,
+                        max_aspect=FILTER_MAX_ASPECT
+                    )
+                    
+                    if len(filtered_boxes) > 0:
+                        cats_found += 1
+                        has_valid_detection = True
+                        frames_since_last_detection = 0
+                        
+                        # Берём первое обнаружение (самое уверенное)
+                        box = filtered_boxes[0]
+                        last_valid_box = box.xyxy[0].cpu().numpy()
+                        last_valid_conf = float(box.conf[0])
+                        
+                        # Рисуем боксы на кадре
+                        for box in filtered_boxes:
+                            xyxy = box.xyxy[0].cpu().numpy()
+                            conf = float(box.conf[0])
+                            
+                            x1, y1, x2, y2 = map(int, xyxy)
+                            
+                            # Рисуем одну толстую оранжевую рамку
+                            cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 165, 255), 8)
+                            
+                            # Добавляем подпись
+                            label = f"Cat: {conf:.2f}"
+                            cv2.putText(frame, label, (x1, y1 - 10), 
+                                       cv2.FONT_HERSHEY_SIMPLEX, 1.0, (0, 165, 255), 3)
+            
+            # Трекинг: если нет валидной детекции, используем последнюю известную позицию
+            if not has_valid_detection and last_valid_box is not None:
+                frames_since_last_detection += 1
+                if frames_since_last_detection <= MAX_FRAMES_WITHOUT_DETECTION:
+                    # Рисуем одну толстую рамку
+                    x1, y1, x2, y2 = map(int, last_valid_box)
+                    cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 165, 255), 8)
+                    label = f"Cat: {last_valid_conf:.2f}"
+                    cv2.putText(frame, label, (x1, y1 - 10), 
+                               cv2.FONT_HERSHEY_SIMPLEX, 1.0, (0, 165, 255), 3)
+            
+            # Записываем кадр в выходное видео
+            out.write(frame)
+            frames_processed += 1
+            
+            # Показываем прогресс
+            if frame_idx % 30 == 0:
+                print(f"   ⏳ Обработано кадров: {frame_idx}/{total_frames}")
+        
+        # Освобождаем ресурсы
+        cap.release()
+        out.release()
+        
+        print(f"   ✅ Найдено кошек в {cats_found} кадрах")
+        print(f"   ✅ Сохранено: {output_path.name}")
+        print(f"   ✅ Успешно обработано: {filename}")
+        return True
+        
+    except PermissionError as e:
+        print(f"   ❌ Ошибка доступа к файлу {filename}: {e}")
+        return False
+        
+    except OSError as e:
+        print(f"   ❌ Ошибка OS при обработке {filename}: {e}")
+        return False
+        
+    except Exception as e:
+        print(f"   ❌ Неожиданная ошибка при обработке {filename}: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+class FrameProbe:
+    """
+    Проверяет наличие кошки на отдельных кадрах видео с произвольным доступом.
+    
+    Кадры читаются через перемотку CAP_PROP_POS_FRAMES; если нужный кадр
+    близко впереди текущей позиции, вместо перемотки кадры пропускаются
+    через grab(). Результаты кэшируются, каждый кадр детектируется один раз.
+    """
+    
+    # Если до кадра меньше стольких кадров - читаем подряд вместо перемотки
+    MAX_GRAB_DISTANCE = 8
+    
+    def __init__(self, model, cap):
+        self.model = model
+        self.cap = cap
+        self.position = 0
+        self.cache = {}
+    
+    def read(self, frame_idx):
+        """Читает кадр с номером frame_idx (или None)."""
+        distance = frame_idx - self.position
+        if distance < 0 or distance > self.MAX_GRAB_DISTANCE:
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, frame_idx)
+        else:
+            for _ in range(distance):
+                self.cap.grab()
+        
+        ret, frame = self.cap.read()
+        self.position = frame_idx + 1
+        return frame if ret else None
+    
+    def detect(self, frame_idx):
+        """Возвращает уверенность лучшего бокса кошки на кадре (0.0 - кошки нет)."""
+        if frame_idx in self.cache:
+            return self.cache[frame_idx]
+        
+        best_conf = 0.0
+        frame = self.read(frame_idx)
+        if frame is not None:
+            results = self.model(frame, conf=0.75, verbose=False)
+            for r in results:
+                boxes = r.boxes
+                if boxes is not None and len(boxes) > 0:
+                    filtered_boxes = filter_cat_detections(
+                        boxes,
+                        min_conf=FILTER_MIN_CONF,
+                        min_size=FILTER_MIN_SIZE,
+                        min_aspect=FILTER_MIN_ASPECT,
+                        max_aspect=FILTER_MAX_ASPECT
+                    )
+                    for box in filtered_boxes:
+                        best_conf = max(best_conf, float(box.conf[0]))
+        
+        self.cache[frame_idx] = best_conf
+        return best_conf
+
+
+def refine_boundary(probe, miss_idx, hit_idx):
+    """
+    Бинарным поиском находит ближайший к hit_idx кадр с кошкой между miss_idx и hit_idx.
+    
+    miss_idx может быть как левее (поиск начала), так и правее (поиск конца) hit_idx.
+    """
+    while abs(hit_idx - miss_idx) > 1:
+        mid = (hit_idx + miss_idx) // 2
+        if probe.detect(mid) > 0:
+            hit_idx = mid
+        else:
+            miss_idx = mid
+    return hit_idx
+
+
+def search_video(model, video_path, step_seconds=1.0, merge_gap=2.0, first_hit_conf=None):
+    """
+    Ищет интервалы, в которых на видео есть кошка, без полного прохода по кадрам.
+    
+    Сначала проверяется каждый кадр с шагом step_seconds, затем границы
+    каждого найденного участка уточняются бинарным поиском до кадра.
+    
+    Параметры:
+        model: загруженная модель YOLO
+        video_path: путь к видео файлу
+        step_seconds: шаг грубого прохода в секундах
+        merge_gap: интервалы с промежутком меньше стольких секунд объединяются
+        first_hit_conf: если задано - остановиться на первом кадре с такой уверенностью
+    
+    Возвращает:
+        Словарь с интервалами (секунды), fps и числом проверенных кадров, или None
+    """
+    cap = cv2.VideoCapture(str(video_path))
+    if not cap.isOpened():
+        print(f"   ❌ Ошибка: не удалось открыть видео")
+        return None
+    
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    if total_frames <= 0:
+        print(f"   ❌ Ошибка: не удалось определить число кадров")
+        cap.release()
+        return None
+    
+    probe = FrameProbe(model, cap)
+    step = max(1, int(round(step_seconds * fps)))
+    samples = list(range(0, total_frames, step))
+    if samples[-1] != total_frames - 1:
+        samples.append(total_frames - 1)
+    
+    # Грубый проход: находим серии подряд идущих выборок с кошкой
+    runs = []
+    run_start = None
+    for i, frame_idx in enumerate(samples):
+        conf = probe.detect(frame_idx)
+        
+        if conf > 0 and run_start is None:
+            run_start = i
+        elif conf == 0 and run_start is not None:
+            runs.append((run_start, i - 1))
+            run_start = None
+        
+        # Ранний выход: уверенное попадание - уточняем только начало текущей серии
+        # (предыдущие выборки серии могут быть попаданиями с меньшей уверенностью)
+        if first_hit_conf is not None and conf > 0 and conf >= first_hit_conf:
+            if run_start == 0:
+                start_idx = samples[0]
+            else:
+                start_idx = refine_boundary(probe, samples[run_start - 1], samples[run_start])
+            cap.release()
+            return {
+                "ranges": [(start_idx / fps, (frame_idx + 1) / fps)],
+                "fps": fps,
+                "frames_checked": len(probe.cache),
+                "total_frames": total_frames,
+            }
+    
+    if run_start is not None:
+        runs.append((run_start, len(samples) - 1))
+    
+    # Точный проход: уточняем начало и конец каждой серии
+    frame_ranges = []
+    for first, last in runs:
+        start_idx = samples[first]
+        if first > 0:
+            start_idx = refine_boundary(probe, samples[first - 1], samples[first])
+        
+        end_idx = samples[last]
+        if last < len(samples) - 1:
+            end_idx = refine_boundary(probe, samples[last + 1], samples[last])
+        
+        # Объединяем интервалы, разделённые коротким пропуском детекции
+        if frame_ranges and (start_idx - frame_ranges[-1][1]) / fps < merge_gap:
+            frame_ranges[-1] = (frame_ranges[-1][0], end_idx)
+        else:
+            frame_ranges.append((start_idx, end_idx))
+    
+    cap.release()
+    
+    return {
+        "ranges": [(start_idx / fps, (end_idx + 1) / fps) for start_idx, end_idx in frame_ranges],
+        "fps": fps,
+        "frames_checked": len(probe.cache),
+        "total_frames": total_frames,
+    }
+
+
+def format_timestamp(seconds):
+    """Форматирует время в секундах как ММ:СС.с"""
+    minutes, seconds = divmod(seconds, 60)
+    return f"{int(minutes):02d}:{seconds:04.1f}"
+
+
+def search_videos(step_seconds=1.0, merge_gap=2.0, first_hit_conf=None):
+    """
+    Ищет интервалы с кошкой во всех видео каталога dataset без рендера mp4.
+    
+    Результаты выводятся в консоль и сохраняются в result/video/search_results.json.
+    
+    Параметры:
+        step_seconds: шаг грубого прохода в секундах
+        merge_gap: интервалы с промежутком меньше стольких секунд объединяются
+        first_hit_conf: если задано - остановиться на первом кадре с такой уверенностью
+    """
+    
+    # Пути к каталогам
+    dataset_dir = Path("dataset")
+    result_dir = RESULT_DIR
+    result_dir.mkdir(parents=True, exist_ok=True)
+    
+    # Проверяем существование каталога dataset
+    if not dataset_dir.exists():
+        print(f"❌ Ошибка: каталог dataset не найден: {dataset_dir}")
+        sys.exit(1)
+    
+    video_files = find_video_files(dataset_dir)
+    if not video_files:
+        print("⚠️  В каталоге dataset не найдены видео файлы")
+        return
+    
+    print(f"🔍 Найдено {len(video_files)} видео файлов для поиска")
+    print("-" * 50)
+    
+    # Загружаем YOLO модель
+    print("🐱 Загружаю YOLOv11n...")
+    try:
+        model = YOLO("yolo11n.pt")
+        print("✅ Модель загружена успешно\n")
+    except Exception as e:
+        print(f"❌ Ошибка загрузки модели: {e}")
+        sys.exit(1)
+    
+    summary = {}
+    
+    for video_path in sorted(video_files):
+        filename = video_path.name
+        print(f"▶️  Ищу кошку: {filename}")
+        
+        try:
+            start_time = time.perf_counter()
+            found = search_video(model, video_path, step_seconds, merge_gap, first_hit_conf)
+            elapsed = time.perf_counter() - start_time
+        except Exception as e:
+            print(f"   ❌ Неожиданная ошибка при обработке {filename}: {e}")
+            import traceback
+            traceback.print_exc()
+            continue
+        
+        if found is None:
+            continue
+        
+        ranges = found["ranges"]
+        if ranges:
+            for start, end in ranges:
+                print(f"   🐱 Кошка: {format_timestamp(start)} - {format_timestamp(end)}")
+        else:
+            print(f"   ➖ Кошка не найдена")
+        
+        share = 100.0 * found["frames_checked"] / found["total_frames"]
+        print(f"   ⏱️  Проверено кадров: {found['frames_checked']}/{found['total_frames']} "
+              f"({share:.1f}%) за {elapsed:.1f} с")
+        
+        summary[filename] = {
+            "cat": bool(ranges),
+            "ranges": [[round(start, 2), round(end, 2)] for start, end in ranges],
+        }
+    
+    output_path = result_dir / "search_results.json"
+    with open(output_path, "w", encoding="utf-8") as f:
+        json.dump(summary, f, ensure_ascii=False, indent=2)
+    
+    print("-" * 50)
+    print(f"📊 Поиск завершён, результаты сохранены в: {output_path.absolute()}")
+
+
 def process_videos():
     """Сканирует каталог dataset, обрабатывает все видео файлы и сохраняет результаты."""
     
     # Пути к каталогам
     dataset_dir = Path("dataset")
-    result_dir = Path("result\\video")
+    result_dir = RESULT_DIR
     
     # Создаём каталог result, если он не существует
     result_dir.mkdir(parents=True, exist_ok=True)
@@ -77,17 +509,7 @@ def process_videos():
         sys.exit(1)
     
     # Находим все видео файлы (MOV, MP4, AVI) - уникальные
-    video_extensions = [".mov", ".mp4", ".avi", ".mkv"]
-    video_files = []
-    seen_names = set()
-    
-    for ext in video_extensions:
-        for video_file in dataset_dir.glob(f"*{ext}"):
-            # Используем lower для уникальности
-            name_lower = video_file.name.lower()
-            if name_lower not in seen_names:
-                seen_names.add(name_lower)
-                video_files.append(video_file)
+    video_files = find_video_files(dataset_dir)
     
     if not video_files:
         print("⚠️  В каталоге dataset не найдены видео файлы")
@@ -109,149 +531,11 @@ def process_videos():
     success_count = 0
     error_count = 0
     
-    # Класс "cat" в COCO - номер 15
-    CAT_CLASS = 15
-    
-    # Параметры фильтрации для устранения ложных срабатываний
-    FILTER_MIN_CONF = 0.85    # Минимальная уверенность
-    FILTER_MIN_SIZE = 50       # Минимальный размер (пикселей)
-    FILTER_MIN_ASPECT = 0.5    # Минимальное соотношение сторон (w/h)
-    FILTER_MAX_ASPECT = 2.0    # Максимальное соотношение сторон (w/h)
-    
     # Обрабатываем каждое видео
     for video_path in sorted(video_files):
-        filename = video_path.name
-        
-        try:
-            print(f"▶️  Обрабатываю: {filename}")
-            
-            # Проверяем доступность файла
-            if not os.access(video_path, os.R_OK):
-                print(f"   ❌ Ошибка доступа: файл недоступен для чтения")
-                error_count += 1
-                continue
-            
-            # Открываем видео для покадровой обработки
-            cap = cv2.VideoCapture(str(video_path))
-            if not cap.isOpened():
-                print(f"   ❌ Ошибка: не удалось открыть видео")
-                error_count += 1
-                continue
-            
-            # Получаем параметры видео
-            fps = int(cap.get(cv2.CAP_PROP_FPS))
-            width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-            height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-            total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-            
-            # Создаём VideoWriter для сохранения результата
-            output_path = result_dir / f"{video_path.stem}.mp4"
-            fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-            out = cv2.VideoWriter(str(output_path), fourcc, fps, (width, height))
-            
-            frame_idx = 0
-            cats_found = 0
-            frames_processed = 0
-            
-            # Трекинг: запоминаем последнюю обнаруженную позицию кошки
-            last_valid_box = None
-            last_valid_conf = 0.0
-            frames_since_last_detection = 0
-            MAX_FRAMES_WITHOUT_DETECTION = 60  # Увеличили до 60 кадров (~2 секунды при 30fps)
-            
-            print(f"   📹 Видео: {width}x{height}, {fps} fps, {total_frames} кадров")
-            
-            # Обрабатываем каждый кадр
-            while cap.isOpened():
-                ret, frame = cap.read()
-                if not ret:
-                    break
-                
-                frame_idx += 1
-                
-                # Обрабатываем каждый кадр
-                results = model(frame, conf=0.75, verbose=False)
-                
-                # Применяем фильтры для устранения ложных срабатываний
-                has_valid_detection = False
-                
-                for r in results:
-                    boxes = r.boxes
-                    if boxes is not None and len(boxes) > 0:
-                        # Фильтруем обнаружения
-                        filtered_boxes = filter_cat_detections(
-                            boxes,
-                            min_conf=FILTER_MIN_CONF,
-                            min_size=FILTER_MIN_SIZE,
-                            min_aspect=FILTER_MIN_ASPECT,
-                            max_aspect=FILTER_MAX_ASPECT
-                        )
-                        
-                        if len(filtered_boxes) > 0:
-                            cats_found += 1
-                            has_valid_detection = True
-                            frames_since_last_detection = 0
-                            
-                            # Берём первое обнаружение (самое уверенное)
-                            box = filtered_boxes[0]
-                            last_valid_box = box.xyxy[0].cpu().numpy()
-                            last_valid_conf = float(box.conf[0])
-                            
-                            # Рисуем боксы на кадре
-                            for box in filtered_boxes:
-                                xyxy = box.xyxy[0].cpu().numpy()
-                                conf = float(box.conf[0])
-                                
-                                x1, y1, x2, y2 = map(int, xyxy)
-                                
-                                # Рисуем одну толстую оранжевую рамку
-                                cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 165, 255), 8)
-                                
-                                # Добавляем подпись
-                                label = f"Cat: {conf:.2f}"
-                                cv2.putText(frame, label, (x1, y1 - 10), 
-                                           cv2.FONT_HERSHEY_SIMPLEX, 1.0, (0, 165, 255), 3)
-                
-                # Трекинг: если нет валидной детекции, используем последнюю известную позицию
-                if not has_valid_detection and last_valid_box is not None:
-                    frames_since_last_detection += 1
-                    if frames_since_last_detection <= MAX_FRAMES_WITHOUT_DETECTION:
-                        # Рисуем одну толстую рамку
-                        x1, y1, x2, y2 = map(int, last_valid_box)
-                        cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 165, 255), 8)
-                        label = f"Cat: {last_valid_conf:.2f}"
-                        cv2.putText(frame, label, (x1, y1 - 10), 
-                                   cv2.FONT_HERSHEY_SIMPLEX, 1.0, (0, 165, 255), 3)
-                
-                # Записываем кадр в выходное видео
-                out.write(frame)
-                frames_processed += 1
-                
-                # Показываем прогресс
-                if frame_idx % 30 == 0:
-                    print(f"   ⏳ Обработано кадров: {frame_idx}/{total_frames}")
-            
-            # Освобождаем ресурсы
-            cap.release()
-            out.release()
-            
-            print(f"   ✅ Найдено кошек в {cats_found} кадрах")
-            print(f"   ✅ Сохранено: {output_path.name}")
-            print(f"   ✅ Успешно обработано: {filename}")
+        if process_video_file(model, video_path, result_dir):
             success_count += 1
-            
-        except PermissionError as e:
-            print(f"   ❌ Ошибка доступа к файлу {filename}: {e}")
-            error_count += 1
-            
-        except OSError as e:
-            print(f"   ❌ Ошибка OS при обработке {filename}: {e}")
-            error_count += 1
-            
-        except Exception as e:
-            print(f"   ❌ Неожиданная ошибка при обработке {filename}: {e}")
-            import traceback
-            traceback.print_exc()
+        else:
             error_count += 1
     
     # Удаляем временную папку runs в конце
@@ -276,9 +560,74 @@ def process_videos():
     print(f"   📁 Результаты сохранены в: {result_dir.absolute()}")
 
 
-if __name__ == "__main__":
+def parse_confidence(value):
+    """Разбирает порог уверенности для argparse: число в диапазоне (0, 1]."""
+    import argparse
+    
     try:
+        conf = float(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"ожидается число, получено: {value}")
+    if not 0 < conf <= 1:
+        raise argparse.ArgumentTypeError(f"уверенность должна быть в диапазоне (0, 1]: {value}")
+    return conf
+
+
+def main():
+    """Точка входа для обработки видео."""
+    import argparse
+    
+    parser = argparse.ArgumentParser(
+        description="Обнаружение кошек на видео из каталога dataset"
+    )
+    parser.add_argument(
+        "--search",
+        action="store_true",
+        help="Только найти интервалы с кошкой, без рендера размеченного видео"
+    )
+    parser.add_argument(
+        "--step",
+        type=float,
+        default=1.0,
+        help="Шаг грубого прохода в секундах для --search (по умолчанию: 1.0)"
+    )
+    parser.add_argument(
+        "--merge-gap",
+        type=float,
+        default=2.0,
+        help="Объединять интервалы с промежутком меньше N секунд (по умолчанию: 2.0)"
+    )
+    parser.add_argument(
+        "--first",
+        type=parse_confidence,
+        nargs="?",
+        const=FILTER_MIN_CONF,
+        default=None,
+        metavar="CONF",
+        help=(
+            f"Остановиться на первом кадре с уверенностью >= CONF, 0 < CONF <= 1 "
+            f"(по умолчанию: {FILTER_MIN_CONF}; меньшие значения работают так же, "
+            f"как {FILTER_MIN_CONF}, потому что фильтр уже отбрасывает детекции ниже него)"
+        )
+    )
+    
+    args = parser.parse_args()
+    
+    # Видео обрабатывается в одном процессе
+    apply_autotune_config(workers=1)
+    if args.search or args.first is not None:
+        search_videos(
+            step_seconds=args.step,
+            merge_gap=args.merge_gap,
+            first_hit_conf=args.first
+        )
+    else:
         process_videos()
+
+
+if __name__ == "__main__":
+    try:
+        main()
     except KeyboardInterrupt:
         print("\n⚠️  Прервано пользователем")
         sys.exit(0)
@@ -0,0 +1,308 @@
+import os
+import sys
+import time
+import queue
+import select
+import struct
+import threading
+import numpy as np
+from pathlib import Path
+from ultralytics import YOLO
+
+from yolo_image import process_image_file, IMAGE_EXTENSIONS, RESULT_DIR as IMAGES_RESULT_DIR
+from yolo_video import process_video_file, VIDEO_EXTENSIONS, RESULT_DIR as VIDEO_RESULT_DIR
+
+
+# Флаги inotify (см. <sys/inotify.h>)
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_NONBLOCK = os.O_NONBLOCK
+
+# Размер заголовка struct inotify_event: wd, mask, cookie, len
+INOTIFY_EVENT_HEADER = struct.calcsize("iIII")
+
+
+def is_supported_file(path):
+    """Проверяет, подходит ли файл для обработки (изображение или видео)."""
+    suffix = path.suffix.lower()
+    return suffix in IMAGE_EXTENSIONS or suffix in VIDEO_EXTENSIONS
+
+
+def open_inotify(directory):
+    """
+    Открывает inotify-дескриптор для каталога.
+
+    Параметры:
+        directory: отслеживаемый каталог
+
+    Возвращает:
+        Файловый дескриптор inotify или None, если inotify недоступен
+    """
+    if not sys.platform.startswith("linux"):
+        return None
+
+    try:
+        import ctypes
+        import ctypes.util
+
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        fd = libc.inotify_init1(IN_NONBLOCK)
+        if fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1")
+
+        # Реагируем только на полностью записанные и перемещённые файлы,
+        # чтобы не читать видео, которое ещё копируется
+        wd = libc.inotify_add_watch(fd, os.fsencode(str(directory)), IN_CLOSE_WRITE | IN_MOVED_TO)
+        if wd < 0:
+            os.close(fd)
+            raise OSError(ctypes.get_errno(), "inotify_add_watch")
+
+        return fd
+    except (OSError, AttributeError) as e:
+        print(f"⚠️  inotify недоступен: {e}")
+        return None
+
+
+def watch_inotify(fd, directory, file_queue, stop_event):
+    """Читает события inotify и кладёт новые файлы в очередь."""
+    try:
+        while not stop_event.is_set():
+            ready, _, _ = select.select([fd], [], [], 0.5)
+            if not ready:
+                continue
+
+            try:
+                data = os.read(fd, 64 * 1024)
+            except BlockingIOError:
+                continue
+
+            offset = 0
+            while offset + INOTIFY_EVENT_HEADER <= len(data):
+                _, _, _, length = struct.unpack_from("iIII", data, offset)
+                name = data[offset + INOTIFY_EVENT_HEADER:offset + INOTIFY_EVENT_HEADER + length]
+                offset += INOTIFY_EVENT_HEADER + length
+
+                name = os.fsdecode(name.rstrip(b"\0"))
+                if not name:
+                    continue
+
+                path = directory / name
+                if is_supported_file(path):
+                    file_queue.put(path)
+    finally:
+        os.close(fd)
+
+
+def watch_polling(directory, file_queue, stop_event, interval=1.0, known=None):
+    """
+    Опрашивает каталог и кладёт новые файлы в очередь.
+
+    Файл ставится в очередь, когда его размер и время изменения
+    не меняются между двумя опросами (копирование завершено).
+
+    Параметры:
+        directory: отслеживаемый каталог
+        file_queue: очередь для новых файлов
+        stop_event: событие остановки
+        interval: интервал опроса в секундах
+        known: файлы, которые уже есть в каталоге и не требуют обработки
+    """
+    # Последнее увиденное состояние файла: (размер, время изменения)
+    seen = {}
+    # Состояние, в котором файл был поставлен в очередь
+    queued = dict(known or {})
+
+    while not stop_event.is_set():
+        current = {}
+        try:
+            for entry in os.scandir(directory):
+                if not entry.is_file():
+                    continue
+                path = Path(entry.path)
+                if not is_supported_file(path):
+                    continue
+                stat = entry.stat()
+                current[path] = (stat.st_size, stat.st_mtime)
+        except OSError as e:
+            print(f"⚠️  Ошибка чтения каталога {directory}: {e}")
+
+        for path, state in current.items():
+            if seen.get(path) == state and queued.get(path) != state:
+                queued[path] = state
+                file_queue.put(path)
+
+        seen = current
+        stop_event.wait(interval)
+
+
+def snapshot_directory(directory):
+    """Возвращает состояние уже существующих файлов каталога: {путь: (размер, mtime)}."""
+    snapshot = {}
+    for path in sorted(directory.iterdir()):
+        if path.is_file() and is_supported_file(path):
+            stat = path.stat()
+            snapshot[path] = (stat.st_size, stat.st_mtime)
+    return snapshot
+
+
+def run_watch_daemon(watch_dir="dataset", process_existing=False, force_polling=False, poll_interval=1.0):
+    """
+    Запускает демон, который держит модель загруженной и обрабатывает новые файлы.
+
+    Параметры:
+        watch_dir: отслеживаемый каталог
+        process_existing: обработать файлы, уже лежащие в каталоге
+        force_polling: не использовать inotify, только опрос каталога
+        poll_interval: интервал опроса в секундах (для режима опроса)
+
+    Возвращает:
+        None
+    """
+
+    # Пути к каталогам
+    dataset_dir = Path(watch_dir)
+    images_dir = IMAGES_RESULT_DIR
+    video_dir = VIDEO_RESULT_DIR
+
+    # Проверяем существование отслеживаемого каталога
+    if not dataset_dir.exists():
+        print(f"❌ Ошибка: каталог не найден: {dataset_dir}")
+        sys.exit(1)
+
+    # Создаём каталоги result, если они не существуют (без очистки)
+    images_dir.mkdir(parents=True, exist_ok=True)
+    video_dir.mkdir(parents=True, exist_ok=True)
+    print(f"📁 Каталоги result готовы: {images_dir.absolute()}, {video_dir.absolute()}")
+
+    # Загружаем YOLO модель один раз на всё время работы
+    print("🐱 Загружаю YOLOv11n...")
+    try:
+        model = YOLO("yolo11n.pt")
+        # Прогревочный проход, чтобы первый файл не платил за инициализацию
+        model(np.zeros((640, 640, 3), dtype=np.uint8), verbose=False)
+        print("✅ Модель загружена и прогрета\n")
+    except Exception as e:
+        print(f"❌ Ошибка загрузки модели: {e}")
+        sys.exit(1)
+
+    file_queue = queue.Queue()
+    stop_event = threading.Event()
+
+    # Уже существующие файлы: либо обрабатываем один раз, либо пропускаем
+    existing = snapshot_directory(dataset_dir)
+    if process_existing:
+        for path in existing:
+            file_queue.put(path)
+        print(f"🔍 В очередь поставлено существующих файлов: {len(existing)}")
+
+    # Выбираем способ наблюдения: inotify или опрос каталога
+    fd = None if force_polling else open_inotify(dataset_dir)
+    if fd is not None:
+        watcher = threading.Thread(
+            target=watch_inotify,
+            args=(fd, dataset_dir, file_queue, stop_event),
+            daemon=True
+        )
+        print(f"👀 Слежу за {dataset_dir.absolute()} (inotify)")
+    else:
+        watcher = threading.Thread(
+            target=watch_polling,
+            args=(dataset_dir, file_queue, stop_event, poll_interval, existing),
+            daemon=True
+        )
+        print(f"👀 Слежу за {dataset_dir.absolute()} (опрос каждые {poll_interval} с)")
+    watcher.start()
+
+    print("-" * 50)
+    print("🎯 Нажмите Ctrl+C для выхода")
+    print("-" * 50)
+
+    # Счётчики для статистики
+    success_count = 0
+    error_count = 0
+
+    try:
+        while True:
+            try:
+                path = file_queue.get(timeout=1.0)
+            except queue.Empty:
+                continue
+
+            if not path.exists():
+                continue
+
+            start_time = time.perf_counter()
+            if path.suffix.lower() in IMAGE_EXTENSIONS:
+                ok = process_image_file(model, path, images_dir)
+            else:
+                ok = process_video_file(model, path, video_dir)
+            elapsed_ms = (time.perf_counter() - start_time) * 1000
+
+            if ok:
+                success_count += 1
+            else:
+                error_count += 1
+            print(f"   ⏱️  Время обработки: {elapsed_ms:.0f} мс (в очереди: {file_queue.qsize()})")
+    finally:
+        stop_event.set()
+        watcher.join(timeout=2.0)
+
+        # Выводим итоговую статистику
+        print("-" * 50)
+        print(f"📊 Демон остановлен:")
+        print(f"   ✅ Успешно: {success_count}")
+        if error_count > 0:
+            print(f"   ❌ Ошибок: {error_count}")
+
+
+def main():
+    """Точка входа для запуска демона наблюдения за каталогом."""
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Демон обнаружения кошек: следит за каталогом и обрабатывает новые файлы"
+    )
+    parser.add_argument(
+        "-d", "--dir",
+        type=str,
+        default="dataset",
+        help="Отслеживаемый каталог (по умолчанию: dataset)"
+    )
+    parser.add_argument(
+        "--existing",
+        action="store_true",
+        help="Обработать файлы, уже лежащие в каталоге"
+    )
+    parser.add_argument(
+        "--poll",
+        action="store_true",
+        help="Использовать опрос каталога вместо inotify"
+    )
+    parser.add_argument(
+        "--interval",
+        type=float,
+        default=1.0,
+        help="Интервал опроса в секундах (по умолчанию: 1.0)"
+    )
+
+    args = parser.parse_args()
+
+    try:
+        run_watch_daemon(
+            watch_dir=args.dir,
+            process_existing=args.existing,
+            force_polling=args.poll,
+            poll_interval=args.interval
+        )
+    except KeyboardInterrupt:
+        print("\n⚠️  Прервано пользователем")
+        sys.exit(0)
+    except Exception as e:
+        print(f"❌ Критическая ошибка: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()